@@ -6,17 +6,61 @@ Uses free tier services for testing
 import asyncio
 import logging
 import os
-from typing import Annotated
+import re
+import time
+from datetime import datetime, timedelta
+from typing import Annotated, Optional
 from livekit import agents, rtc
 from livekit.agents import JobContext, WorkerOptions, cli, tokenize, tts
+from livekit.agents.utils.connection_pool import ConnectionPool
 from livekit.plugins import deepgram, openai, silero
-import httpx
+from dateparser.search import search_dates
+import aiohttp
+import orjson
 
 # Configure logging
 logging.basicConfig(level=logging.INFO)
 logger = logging.getLogger(__name__)
 
 
+class AvailabilityCache:
+    """Short-TTL cache for availability answers.
+
+    Callers often rephrase the same date/time several turns in a row, and the
+    backend's availability barely changes over a minute - serving repeats from
+    memory (~10ms) instead of the API round-trip (200-500ms) removes dead air.
+    """
+
+    def __init__(self, ttl_seconds: float = 60.0):
+        self._ttl = ttl_seconds
+        self._entries: dict[tuple, tuple[float, str]] = {}
+
+    def get(self, business_id: str, date: str, duration_minutes: int) -> Optional[str]:
+        key = (business_id, date, duration_minutes)
+        entry = self._entries.get(key)
+        if entry is None:
+            return None
+        expires_at, answer = entry
+        if time.monotonic() > expires_at:
+            del self._entries[key]
+            return None
+        return answer
+
+    def put(self, business_id: str, date: str, duration_minutes: int, answer: str):
+        key = (business_id, date, duration_minutes)
+        self._entries[key] = (time.monotonic() + self._ttl, answer)
+
+    def invalidate(self, business_id: str, date: str):
+        """Drop cached answers for a date after a booking changes its slots"""
+        stale = [k for k in self._entries if k[0] == business_id and k[1] == date]
+        for key in stale:
+            del self._entries[key]
+
+
+# Shared across all rooms handled by this worker process
+_availability_cache = AvailabilityCache()
+
+
 class AppointmentBookingAgent:
     """AI Agent for booking appointments via phone"""
 
@@ -24,6 +68,27 @@ class AppointmentBookingAgent:
         self.business_id = business_id
         self.elevoi_api_url = os.getenv("ELEVOI_API_URL", "https://elevoi.vercel.app")
         self.elevoi_api_key = os.getenv("ELEVOI_API_KEY", "")
+        # Older deployments exposed the same endpoints under /api/appointments
+        self._endpoint_prefix = os.getenv("ELEVOI_ENDPOINT_PREFIX", "/api/voice-agent")
+        # ETags from availability responses, per date. Sent back as If-Match
+        # on booking so the backend can skip its own re-check and reject
+        # atomically if the slots changed since we looked.
+        self._slot_etags: dict[str, str] = {}
+        # Long-lived pooled session - avoids a fresh TCP+TLS handshake (~150ms
+        # of dead air) on every tool call, and aiohttp holds up much better
+        # than httpx under many concurrent rooms per worker
+        self._session = aiohttp.ClientSession(
+            base_url=self.elevoi_api_url,
+            headers={"Authorization": f"Bearer {self.elevoi_api_key}"},
+            timeout=aiohttp.ClientTimeout(total=10.0),
+            connector=aiohttp.TCPConnector(
+                limit=100, limit_per_host=30, keepalive_timeout=75
+            ),
+        )
+
+    async def aclose(self):
+        """Close the pooled HTTP session"""
+        await self._session.close()
 
     async def check_availability(
         self,
@@ -31,21 +96,25 @@ class AppointmentBookingAgent:
         duration_minutes: Annotated[int, "Duration in minutes (default 30)"] = 30
     ) -> str:
         """Check available appointment slots for a given date"""
+        cached = _availability_cache.get(self.business_id, date, duration_minutes)
+        if cached is not None:
+            logger.info(f"Availability cache hit for {date}")
+            return cached
+
         try:
-            async with httpx.AsyncClient() as client:
-                response = await client.get(
-                    f"{self.elevoi_api_url}/api/voice-agent/availability",
-                    params={
-                        "businessId": self.business_id,
-                        "date": date,
-                        "duration": duration_minutes
-                    },
-                    headers={"Authorization": f"Bearer {self.elevoi_api_key}"},
-                    timeout=10.0
-                )
-
-                if response.status_code == 200:
-                    data = response.json()
+            async with self._session.get(
+                f"{self._endpoint_prefix}/availability",
+                params={
+                    "businessId": self.business_id,
+                    "date": date,
+                    "duration": duration_minutes
+                },
+            ) as response:
+                if response.status == 200:
+                    etag = response.headers.get("ETag")
+                    if etag:
+                        self._slot_etags[date] = etag
+                    data = await response.json(loads=orjson.loads)
                     if data.get("available") and data.get("slots"):
                         slots = data["slots"][:5]  # Show first 5 slots
                         slot_times = []
@@ -59,11 +128,14 @@ class AppointmentBookingAgent:
 
                         if slot_times:
                             times_str = ", ".join(slot_times[:3])
-                            return f"Yes, we have availability on {date}. Some available times are: {times_str}. What time works best for you?"
+                            answer = f"Yes, we have availability on {date}. Some available times are: {times_str}. What time works best for you?"
                         else:
-                            return f"We have {len(slots)} available slots on {date}. What time would you prefer?"
+                            answer = f"We have {len(slots)} available slots on {date}. What time would you prefer?"
                     else:
-                        return f"I'm sorry, we don't have any availability on {date}. Would you like to try a different date?"
+                        answer = f"I'm sorry, we don't have any availability on {date}. Would you like to try a different date?"
+
+                    _availability_cache.put(self.business_id, date, duration_minutes, answer)
+                    return answer
                 else:
                     return "I'm having trouble checking availability. Let me transfer you to our staff."
         except Exception as e:
@@ -81,37 +153,51 @@ class AppointmentBookingAgent:
     ) -> str:
         """Book an appointment for the customer"""
         try:
-            from datetime import datetime, timedelta
-
-            # Parse date and time
-            start_datetime = datetime.strptime(f"{date} {time}", "%Y-%m-%d %H:%M")
+            # fromisoformat is ~10x faster than strptime (no format-string
+            # compilation per call), but unlike strptime it rejects unpadded
+            # hours like "9:00", which LLMs routinely emit - zero-pad first
+            hour, minute = time.split(":")
+            start_datetime = datetime.fromisoformat(f"{date}T{int(hour):02d}:{minute}:00")
             end_datetime = start_datetime + timedelta(minutes=duration_minutes)
 
             # Format as ISO strings
             start_time_iso = start_datetime.isoformat()
             end_time_iso = end_datetime.isoformat()
 
-            async with httpx.AsyncClient() as client:
-                response = await client.post(
-                    f"{self.elevoi_api_url}/api/voice-agent/book",
-                    json={
-                        "businessId": self.business_id,
-                        "customerName": customer_name,
-                        "customerPhone": customer_phone,
-                        "service": service,
-                        "startTime": start_time_iso,
-                        "endTime": end_time_iso,
-                        "notes": "Booked via AI voice agent"
-                    },
-                    headers={"Authorization": f"Bearer {self.elevoi_api_key}"},
-                    timeout=10.0
-                )
-
-                if response.status_code == 201:
-                    data = response.json()
+            # If we checked availability for this date, let the backend verify
+            # the slots haven't changed instead of re-querying them
+            headers = {}
+            etag = self._slot_etags.get(date)
+            if etag:
+                headers["If-Match"] = etag
+
+            async with self._session.post(
+                f"{self._endpoint_prefix}/book",
+                headers=headers,
+                json={
+                    "businessId": self.business_id,
+                    "customerName": customer_name,
+                    "customerPhone": customer_phone,
+                    "service": service,
+                    "startTime": start_time_iso,
+                    "endTime": end_time_iso,
+                    "notes": "Booked via AI voice agent"
+                },
+            ) as response:
+                if response.status == 201:
+                    data = await response.json(loads=orjson.loads)
+                    # The slot we just took is no longer available
+                    _availability_cache.invalidate(self.business_id, date)
+                    self._slot_etags.pop(date, None)
                     return f"Perfect! Your {service} appointment is confirmed for {date} at {time}. You'll receive a confirmation text message shortly. Is there anything else I can help you with?"
+                elif response.status == 412:
+                    # Precondition failed: someone booked between our check
+                    # and this commit
+                    _availability_cache.invalidate(self.business_id, date)
+                    self._slot_etags.pop(date, None)
+                    return f"I apologize, but that time slot was just booked by someone else. Let me check other available times for you."
                 else:
-                    error_data = response.json()
+                    error_data = await response.json(loads=orjson.loads)
                     error_msg = error_data.get("error", "Please try again.")
                     if "already booked" in error_msg.lower():
                         return f"I apologize, but that time slot was just booked by someone else. Let me check other available times for you."
@@ -121,15 +207,136 @@ class AppointmentBookingAgent:
             return "I'm having trouble booking the appointment right now. Let me transfer you to our staff."
 
 
+# Built once at import - entrypoint only substitutes the business name per
+# session instead of re-assembling the multi-line literal on every room join
+_SYSTEM_PROMPT_TEMPLATE = (
+    "You are a friendly, professional appointment booking assistant for {business_name}. "
+    "Your job is to help customers book appointments quickly and efficiently. "
+    "\n\nFollow these steps:"
+    "\n1. Greet the customer warmly"
+    "\n2. Ask what service they need"
+    "\n3. Ask for their preferred date and time"
+    "\n4. Check availability using the check_availability tool"
+    "\n5. If available, collect their name and confirm booking using book_appointment tool"
+    "\n6. If not available, suggest alternative times"
+    "\n7. Confirm all details before ending the call"
+    "\n\nBe conversational, friendly, and efficient. Keep responses concise."
+    "\n\nImportant:"
+    "\n- Always confirm details before booking"
+    "\n- If you can't help, offer to transfer to a staff member"
+    "\n- Use natural, conversational language"
+    "\n- Don't repeat yourself"
+)
+
+
+# One Silero VAD per worker: the Torch weights are read-only (only the RNN
+# state is per-stream), so every room can share a single loaded module
+_vad_instance: Optional[silero.VAD] = None
+_vad_lock = asyncio.Lock()
+
+
+async def _get_vad() -> silero.VAD:
+    """Load the Silero VAD once per worker, off the event loop"""
+    global _vad_instance
+    async with _vad_lock:
+        if _vad_instance is None:
+            _vad_instance = await asyncio.to_thread(silero.VAD.load)
+    return _vad_instance
+
+
+async def _connect_stt() -> deepgram.STT:
+    return deepgram.STT(
+        model="nova-2-phonecall",   # tuned for telephony audio
+        interim_results=True,
+        endpointing_ms=300,         # finalize after 300ms of silence
+        smart_format=True,
+    )
+
+
+async def _connect_tts() -> deepgram.TTS:
+    return deepgram.TTS(model="aura-asteria-en")
+
+
+# Worker-level pools for the STT/TTS plugins. Reusing instances across the
+# rooms a worker handles keeps their underlying websockets warm, so the first
+# spoken sentence of a call skips the ~100-200ms handshake.
+_stt_pool = ConnectionPool[deepgram.STT](max_session_duration=300, connect_cb=_connect_stt)
+_tts_pool = ConnectionPool[deepgram.TTS](max_session_duration=300, connect_cb=_connect_tts)
+
+
+# A spoken time like "3pm", "10:30" or "10:30am" - used as the signal that the
+# caller is talking about a slot, so prefetching availability is worthwhile
+_TIME_RE = re.compile(
+    r"\b\d{1,2}:\d{2}\b|\b\d{1,2}(?::\d{2})?\s*(?:am|pm)\b", re.IGNORECASE
+)
+
+# Strong references to in-flight prefetch tasks - the event loop only keeps
+# weak ones, so an unreferenced task can be garbage-collected mid-flight
+_prefetch_tasks: set[asyncio.Task] = set()
+
+
+def _extract_date(text: str) -> Optional[str]:
+    """Pull a YYYY-MM-DD date out of a free-form utterance, if there is one"""
+    try:
+        results = search_dates(
+            text, languages=["en"], settings={"PREFER_DATES_FROM": "future"}
+        )
+    except Exception:
+        return None
+    if not results:
+        return None
+    return results[0][1].strftime("%Y-%m-%d")
+
+
+# Canned replies for unambiguous call-closing turns. These never need tools or
+# business context, so answering from a table (~10ms) beats a full LLM
+# round-trip (~600ms) and costs nothing. Confirmation words like "okay" or
+# "perfect" must NOT go here: in a booking dialog they usually accept a
+# proposed slot, and short-circuiting them would drop the booking. Keys are
+# normalized: lowercased, punctuation stripped, whitespace collapsed - so they
+# survive smart_format transcripts like "No, that's all."
+_PUNCTUATION_RE = re.compile(r"[^a-z0-9\s]+")
+
+_SMALL_TALK_RESPONSES = {
+    "thanks": "You're welcome! Is there anything else I can help you with?",
+    "thank you": "You're welcome! Is there anything else I can help you with?",
+    "thanks a lot": "You're welcome! Is there anything else I can help you with?",
+    "no thats all": "Perfect, thank you for calling. Have a great day!",
+    "no thank you": "Perfect, thank you for calling. Have a great day!",
+    "goodbye": "Thank you for calling. Have a great day!",
+    "bye": "Thank you for calling. Have a great day!",
+}
+
+
+def _canned_reply(chat_ctx: agents.llm.ChatContext) -> Optional[str]:
+    """Return a canned response if the last user turn is plain chit-chat"""
+    for msg in reversed(chat_ctx.messages):
+        if msg.role == "user":
+            if not isinstance(msg.content, str):
+                return None
+            normalized = _PUNCTUATION_RE.sub("", msg.content.lower())
+            normalized = " ".join(normalized.split())
+            return _SMALL_TALK_RESPONSES.get(normalized)
+    return None
+
+
+async def _before_llm(assistant: agents.VoiceAssistant, chat_ctx: agents.llm.ChatContext):
+    canned = _canned_reply(chat_ctx)
+    if canned is not None:
+        logger.info("Serving canned reply, skipping LLM call")
+        await assistant.say(canned, allow_interruptions=True)
+        return False  # cancel the LLM reply
+    return None
+
+
 async def entrypoint(ctx: JobContext):
     """Main entry point for the voice agent"""
     logger.info(f"Starting voice agent for room: {ctx.room.name}")
 
     # Get business context from room metadata
     room_metadata = ctx.room.metadata or "{}"
-    import json
     try:
-        metadata = json.loads(room_metadata)
+        metadata = orjson.loads(room_metadata)
         business_name = metadata.get("businessName", "our business")
         business_id = metadata.get("businessId")
     except:
@@ -144,52 +351,80 @@ async def entrypoint(ctx: JobContext):
 
     # Initialize booking helper with business_id
     booking_agent = AppointmentBookingAgent(business_id)
+    ctx.add_shutdown_callback(booking_agent.aclose)
 
-    # Create system prompt
+    # Create system prompt from the pre-built template
     initial_ctx = agents.llm.ChatContext().append(
         role="system",
-        text=(
-            f"You are a friendly, professional appointment booking assistant for {business_name}. "
-            "Your job is to help customers book appointments quickly and efficiently. "
-            "\n\nFollow these steps:"
-            "\n1. Greet the customer warmly"
-            "\n2. Ask what service they need"
-            "\n3. Ask for their preferred date and time"
-            "\n4. Check availability using the check_availability tool"
-            "\n5. If available, collect their name and confirm booking using book_appointment tool"
-            "\n6. If not available, suggest alternative times"
-            "\n7. Confirm all details before ending the call"
-            "\n\nBe conversational, friendly, and efficient. Keep responses concise."
-            "\n\nImportant:"
-            "\n- Always confirm details before booking"
-            "\n- If you can't help, offer to transfer to a staff member"
-            "\n- Use natural, conversational language"
-            "\n- Don't repeat yourself"
-        ),
+        text=_SYSTEM_PROMPT_TEMPLATE.format(business_name=business_name),
     )
 
-    # Initialize voice agent
+    # Fetch the shared VAD (a real load only on the worker's first room) and
+    # connect in parallel so startup pays max() of the two instead of their sum
+    vad_task = asyncio.create_task(_get_vad())
     logger.info("Connecting to room...")
-    await ctx.connect(auto_subscribe=agents.AutoSubscribe.AUDIO_ONLY)
+    connect_task = asyncio.create_task(
+        ctx.connect(auto_subscribe=agents.AutoSubscribe.AUDIO_ONLY)
+    )
+
+    # Check the plugin pools out for the lifetime of this session and return
+    # them when the room shuts down
+    stt = await _stt_pool.get()
+    tts = await _tts_pool.get()
+
+    async def _release_plugins():
+        _stt_pool.put(stt)
+        _tts_pool.put(tts)
+
+    ctx.add_shutdown_callback(_release_plugins)
+
+    llm = openai.LLM(           # Use OpenAI for now (will switch to Groq)
+        model="gpt-4o-mini",
+        temperature=0.7,
+    )
+
+    await connect_task
 
     # Wait for first participant
     participant = await ctx.wait_for_participant()
     logger.info(f"Participant joined: {participant.identity}")
 
+    vad = await vad_task
+
     # Create voice agent with plugins
     agent = agents.VoiceAssistant(
-        vad=silero.VAD.load(),  # Voice Activity Detection
-        stt=deepgram.STT(),     # Speech-to-Text (Deepgram free tier)
-        llm=openai.LLM(         # Use OpenAI for now (will switch to Groq)
-            model="gpt-4o-mini",
-            temperature=0.7,
-        ),
-        tts=openai.TTS(          # Text-to-Speech
-            voice="alloy",
-        ),
+        vad=vad,
+        stt=stt,
+        llm=llm,
+        tts=tts,
         chat_ctx=initial_ctx,
+        before_llm_cb=_before_llm,
     )
 
+    # Speculatively warm the availability cache as soon as the caller mentions
+    # a date and time, so the LLM's eventual check_availability tool call is a
+    # cache hit instead of a fresh API round-trip. The GET is idempotent, so a
+    # wrong guess costs nothing but a wasted request.
+    async def _prefetch(text: str):
+        # dateparser does locale detection and lazy-loads locale data on
+        # first use - keep it off the realtime event loop
+        date = await asyncio.to_thread(_extract_date, text)
+        if date is None:
+            return
+        if _availability_cache.get(business_id, date, 30) is None:
+            logger.info(f"Prefetching availability for {date}")
+            await booking_agent.check_availability(date)
+
+    def _prefetch_availability(msg: agents.llm.ChatMessage):
+        text = msg.content if isinstance(msg.content, str) else ""
+        if not text or not _TIME_RE.search(text):
+            return
+        task = asyncio.create_task(_prefetch(text))
+        _prefetch_tasks.add(task)
+        task.add_done_callback(_prefetch_tasks.discard)
+
+    agent.on("user_speech_committed", _prefetch_availability)
+
     # Register tools
     agent.register_function(
         "check_availability",
@@ -205,8 +440,24 @@ async def entrypoint(ctx: JobContext):
     logger.info("Starting voice assistant...")
     agent.start(ctx.room, participant)
 
+    # Prime the LLM connection while the greeting audio is playing, so the
+    # caller's first real turn doesn't pay the HTTP handshake / provider
+    # warm-start (~150-300ms, fully hidden under the greeting)
+    async def _warm_llm():
+        try:
+            stream = llm.chat(
+                chat_ctx=agents.llm.ChatContext().append(role="user", text="ready?")
+            )
+            async for _ in stream:
+                pass
+        except Exception as e:
+            logger.debug(f"LLM warm-up failed: {e}")
+
+    warm_task = asyncio.create_task(_warm_llm())
+
     # Greet the user
     await agent.say("Hello! Thank you for calling. How can I help you today?", allow_interruptions=True)
+    await warm_task
 
     logger.info("Voice agent is now active and listening")
 